@@ -25,6 +25,7 @@ from PIL import Image, ImageDraw
 from eversense_client import EversenseClient
 from glucose_db import GlucoseDB
 from login_dialog import LoginDialog
+from notifier import NotificationDispatcher
 
 gi.require_version("Gtk", "3.0")
 gi.require_version("AppIndicator3", "0.1")
@@ -40,25 +41,20 @@ if not CONFIG_DIR.exists():
 if not LOG_DIR.exists():
     LOG_DIR.mkdir(parents=True)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",  # Format log messages
-    handlers=[
-        logging.StreamHandler(),  # Logs to the console
-        logging.FileHandler(LOG_DIR / "eversense-tray.log", mode="a"),  # Logs to a file
-    ],
-)
-
 
 class GlucoseApp:
     CONFIG_FILE = CONFIG_DIR / "config.ini"
     DB_FILE = CONFIG_DIR / "glucose.db"
 
     LOW_THRESHOLD = 4.0
+    URGENT_LOW_THRESHOLD = 3.0
     HIGH_THRESHOLD = 15.0
     NORMAL_THRESHOLD_MIN = 5.0
     NORMAL_THRESHOLD_MAX = 10.0
     FETCH_INTERVAL_SEC = 5 * 60
+    TRAY_LOG_INTERVAL_SEC = 30 * 60
+    LOW_REPEAT_INTERVAL_SEC = 15 * 60
+    LOW_ESCALATE_AFTER = 2
 
     def __init__(self):
         self.config = configparser.ConfigParser()
@@ -67,7 +63,12 @@ class GlucoseApp:
         self.db = GlucoseDB(self.DB_FILE)
         self.user_id = None
         self.low_alerted = False
+        self.low_since = None
+        self.low_last_alert = None
+        self.low_alert_count = 0
+        self.low_alert_urgent = False
         self.high_alerted = False
+        self.notifier = NotificationDispatcher("Eversense CGM")
         self.current_glucose = None
         self.trend_arrow = "→"
         self.indicator = None
@@ -242,23 +243,58 @@ class GlucoseApp:
         else:
             return "→"
 
-    @classmethod
-    def notify(cls, title, message):
-        n = notify2.Notification(title, message)
-        n.set_urgency(notify2.URGENCY_NORMAL)
-        n.show()
+    def notify(self, key, title, message, urgency=notify2.URGENCY_NORMAL):
+        self.notifier.show(key, title, message, urgency)
+
+    def dismiss(self, key):
+        self.notifier.close(key)
 
     def check_alerts(self, glucose_val):
-        if glucose_val < self.LOW_THRESHOLD and not self.low_alerted:
-            self.notify("Low Glucose Alert", f"Glucose low: {glucose_val:.1f} mmol/L")
+        now = time.time()
+        if glucose_val < self.LOW_THRESHOLD:
+            if self.high_alerted:
+                self.dismiss("high")
+                self.high_alerted = False
+
+            if not self.low_alerted:
+                self.low_since = now
+                self.low_alert_count = 0
+                self.low_alert_urgent = False
+                message = f"Glucose low: {glucose_val:.1f} mmol/L"
+            elif glucose_val < self.URGENT_LOW_THRESHOLD and not self.low_alert_urgent:
+                # Dropping into urgent low escalates right away instead of waiting for the next repeat
+                message = f"Glucose urgently low: {glucose_val:.1f} mmol/L"
+            elif now - self.low_last_alert >= self.LOW_REPEAT_INTERVAL_SEC:
+                minutes = int((now - self.low_since) // 60)
+                message = f"Glucose still low after {minutes} min: {glucose_val:.1f} mmol/L"
+            else:
+                return
+
+            # Escalate when the value is dangerously low or the low has been repeated without recovery
+            self.low_alert_count += 1
+            self.low_alert_urgent = (
+                glucose_val < self.URGENT_LOW_THRESHOLD or self.low_alert_count > self.LOW_ESCALATE_AFTER
+            )
+            if self.low_alert_urgent:
+                self.notify("low", "Urgent Low Glucose Alert", message, notify2.URGENCY_CRITICAL)
+            else:
+                self.notify("low", "Low Glucose Alert", message)
             self.low_alerted = True
-            self.high_alerted = False
-        elif glucose_val > self.HIGH_THRESHOLD and not self.high_alerted:
-            self.notify("High Glucose Alert", f"Glucose high: {glucose_val:.1f} mmol/L")
-            self.high_alerted = True
-            self.low_alerted = False
-        elif self.LOW_THRESHOLD <= glucose_val <= self.HIGH_THRESHOLD:
-            # reset alerts
+            self.low_last_alert = now
+        elif glucose_val > self.HIGH_THRESHOLD:
+            if self.low_alerted:
+                self.dismiss("low")
+                self.low_alerted = False
+
+            if not self.high_alerted:
+                self.notify("high", "High Glucose Alert", f"Glucose high: {glucose_val:.1f} mmol/L")
+                self.high_alerted = True
+        else:
+            # back in range, reset alerts
+            if self.low_alerted:
+                self.dismiss("low")
+            if self.high_alerted:
+                self.dismiss("high")
             self.low_alerted = False
             self.high_alerted = False
 
@@ -292,7 +328,8 @@ class GlucoseApp:
         color = self.glucose_color(self.current_glucose)
         self.update_tray_icon(color)
         self.logger.info(
-            f"[Tray] Updated with glucose value: {self.current_glucose}, trend: {self.trend_arrow}, color: {color}"
+            f"[Tray] Updated with glucose value: {self.current_glucose}, trend: {self.trend_arrow}, color: {color}",
+            extra={"log_interval": self.TRAY_LOG_INTERVAL_SEC},
         )
 
     def load_events(self):
@@ -407,6 +444,7 @@ class GlucoseApp:
 
         buf = io.BytesIO()
         fig.savefig(buf, format="png")
+        plt.close(fig)
         buf.seek(0)
         pil_im = Image.open(buf)
         width, height = pil_im.size
@@ -421,6 +459,7 @@ class GlucoseApp:
     def run(self):
         self.logger.info("[Main] Starting app")
         self.setup_tray()
+        self.notifier.start()
         self.fetch_thread = threading.Thread(target=self.fetch_loop, daemon=True)
         self.fetch_thread.start()
         self.logger.info("[Main] Fetch loop started")
@@ -0,0 +1,236 @@
+import argparse
+import datetime
+import json
+import logging
+import math
+import random
+import resource
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from unittest import mock
+
+import app
+import eversense_client
+import glucose_db
+from app import GlucoseApp
+from fake_server import FakeEversenseServer, SimulatedClock, SimulationFinished
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile; returns 0.0 for an empty sample."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class BenchmarkApp(GlucoseApp):
+    """GlucoseApp wired to a fake server and a simulated clock, timing each stage of the fetch loop."""
+
+    def __init__(self, workdir, server, clock, graph_every_sec=None):
+        self.CONFIG_FILE = workdir / "config.ini"
+        self.DB_FILE = workdir / "glucose.db"
+        self.CONFIG_FILE.write_text("[auth]\nusername = benchmark@example.com\npassword = benchmark\n")
+
+        self.server = server
+        self.sim_clock = clock
+        self.graph_every_sec = graph_every_sec
+        self.timings = {"load_events": [], "graph": []}
+        self.alerts = []
+        self.samples = []
+        self.start_ts = clock.time()
+        self.next_graph_ts = self.start_ts + graph_every_sec if graph_every_sec else None
+        self.next_sample_ts = self.start_ts + 24 * 60 * 60
+        self.cpu_start = time.process_time()
+        super().__init__()
+        server.configure_client(self.client)
+
+    def setup_dbus_listeners(self):
+        pass
+
+    def notify(self, key, title, message, urgency=None):
+        self.alerts.append((self.sim_clock.now(datetime.timezone.utc), key, title, message))
+
+    def load_events(self):
+        started = time.perf_counter()
+        try:
+            super().load_events()
+        finally:
+            self.timings["load_events"].append(time.perf_counter() - started)
+
+        now = self.sim_clock.time()
+        if self.next_graph_ts is not None and now >= self.next_graph_ts:
+            self.render_graph()
+            self.next_graph_ts += self.graph_every_sec
+        if now >= self.next_sample_ts:
+            self.take_sample()
+            self.next_sample_ts += 24 * 60 * 60
+
+    def render_graph(self):
+        started = time.perf_counter()
+        window = self.create_graph_window()
+        self.timings["graph"].append(time.perf_counter() - started)
+        window.destroy()
+
+    def take_sample(self):
+        self.samples.append(
+            {
+                "day": round((self.sim_clock.time() - self.start_ts) / (24 * 60 * 60), 2),
+                "cpu_sec": round(time.process_time() - self.cpu_start, 3),
+                "rss_mb": round(current_rss_mb(), 1),
+                "requests": self.server.total_requests,
+                "readings": len(self.server.served_readings),
+            }
+        )
+
+
+def run_benchmark(
+    days=3.0,
+    latency_ms=5.0,
+    latency_jitter_ms=5.0,
+    error_rate=0.0,
+    token_lifetime_sec=43200,
+    advertised_lifetime_sec=None,
+    graph_every_hours=6.0,
+    seed=0,
+):
+    random.seed(seed)
+    start = datetime.datetime.now(datetime.timezone.utc)
+    clock = SimulatedClock(start=start, end=start + datetime.timedelta(days=days))
+    simulated_datetime = clock.datetime_module()
+
+    server = FakeEversenseServer(
+        clock=clock,
+        latency_sec=latency_ms / 1000,
+        latency_jitter_sec=latency_jitter_ms / 1000,
+        error_rate=error_rate,
+        token_lifetime_sec=token_lifetime_sec,
+        advertised_lifetime_sec=advertised_lifetime_sec,
+        seed=seed,
+    )
+
+    with ExitStack() as stack, tempfile.TemporaryDirectory() as tmp:
+        stack.enter_context(server)
+        stack.enter_context(mock.patch.object(app, "time", clock))
+        stack.enter_context(mock.patch.object(eversense_client, "time", clock))
+        stack.enter_context(mock.patch.object(app, "datetime", simulated_datetime))
+        stack.enter_context(mock.patch.object(glucose_db, "datetime", simulated_datetime))
+        # No GLib main loop runs here, so queued tray updates would only pile up as idle sources
+        stack.enter_context(mock.patch.object(app.GLib, "idle_add", lambda *args: 0))
+
+        graph_every_sec = graph_every_hours * 60 * 60 if graph_every_hours else None
+        bench = BenchmarkApp(Path(tmp), server, clock, graph_every_sec)
+        wall_start = time.perf_counter()
+        try:
+            bench.fetch_loop()
+        except SimulationFinished:
+            pass
+        wall_sec = time.perf_counter() - wall_start
+        bench.take_sample()
+
+    readings = len(server.served_readings)
+    return {
+        "simulated_days": days,
+        "wall_sec": round(wall_sec, 3),
+        "latency_ms": {
+            name: {
+                "count": len(values),
+                "p50": round(percentile(values, 50) * 1000, 2),
+                "p99": round(percentile(values, 99) * 1000, 2),
+            }
+            for name, values in bench.timings.items()
+        },
+        "requests": dict(server.requests),
+        "statuses": {str(status): count for status, count in server.statuses.items()},
+        "readings": readings,
+        "requests_per_reading": round(server.total_requests / readings, 4) if readings else None,
+        "alerts": len(bench.alerts),
+        "samples": bench.samples,
+    }
+
+
+def print_report(report):
+    print(f"Simulated {report['simulated_days']} days in {report['wall_sec']:.1f}s wall time")
+    print()
+    print(f"{'stage':<14}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, stats in report["latency_ms"].items():
+        print(f"{name:<14}{stats['count']:>8}{stats['p50']:>10.2f}{stats['p99']:>10.2f}")
+    print()
+    for endpoint, count in sorted(report["requests"].items()):
+        print(f"{endpoint:<44}{count:>8}")
+    print(f"HTTP statuses: {report['statuses']}")
+    print(f"Readings: {report['readings']}, requests per reading: {report['requests_per_reading']}")
+    print(f"Alerts raised: {report['alerts']}")
+    print()
+    print(f"{'day':>6}{'cpu s':>10}{'rss MB':>10}{'requests':>10}{'readings':>10}")
+    for sample in report["samples"]:
+        print(
+            f"{sample['day']:>6}{sample['cpu_sec']:>10}{sample['rss_mb']:>10}"
+            f"{sample['requests']:>10}{sample['readings']:>10}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the fetch loop, database and graph rendering against a local fake Eversense server "
+        "under accelerated time and report latency, request and resource usage.",
+    )
+    parser.add_argument("--days", type=float, default=3.0, help="Simulated days to run (default: 3)")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Base server latency per request")
+    parser.add_argument("--latency-jitter-ms", type=float, default=5.0, help="Random extra server latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--token-lifetime", type=int, default=43200, help="Real token lifetime in seconds")
+    parser.add_argument(
+        "--advertised-lifetime", type=int, default=None, help="Token lifetime reported to the client in seconds"
+    )
+    parser.add_argument(
+        "--graph-every-hours", type=float, default=6.0, help="Render the graph every N simulated hours, 0 disables"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the trace, jitter and injected errors")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show application log output while running")
+    parser.add_argument(
+        "--max-p99-ms", type=float, default=None, help="Exit non-zero if load_events p99 exceeds this value"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.CRITICAL)
+
+    report = run_benchmark(
+        days=args.days,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        error_rate=args.error_rate,
+        token_lifetime_sec=args.token_lifetime,
+        advertised_lifetime_sec=args.advertised_lifetime,
+        graph_every_hours=args.graph_every_hours,
+        seed=args.seed,
+    )
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    if args.max_p99_ms is not None and report["latency_ms"]["load_events"]["p99"] > args.max_p99_ms:
+        print(f"load_events p99 exceeds {args.max_p99_ms} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
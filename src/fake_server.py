@@ -0,0 +1,312 @@
+import datetime
+import json
+import logging
+import math
+import random
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from zoneinfo import ZoneInfo
+
+STOCKHOLM = ZoneInfo("Europe/Stockholm")
+
+
+class SimulatedClock:
+    """A clock that only moves when someone sleeps on it, so days of polling can run in seconds."""
+
+    def __init__(self, start=None, end=None):
+        start = start or datetime.datetime.now(datetime.timezone.utc)
+        self._now = start.timestamp()
+        self.end = end.timestamp() if end else None
+        self.lock = threading.Lock()
+
+    def time(self):
+        with self.lock:
+            return self._now
+
+    def monotonic(self):
+        return self.time()
+
+    def sleep(self, seconds):
+        with self.lock:
+            self._now += max(seconds, 0)
+            finished = self.end is not None and self._now >= self.end
+        if finished:
+            raise SimulationFinished()
+
+    def now(self, tz=None):
+        return datetime.datetime.fromtimestamp(self.time(), tz)
+
+    def datetime_module(self):
+        """Return a stand-in for the ``datetime`` module whose ``datetime.now()`` follows this clock."""
+        clock = self
+
+        class SimulatedDatetime(datetime.datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return clock.now(tz)
+
+        return type(
+            "datetime",
+            (),
+            {"datetime": SimulatedDatetime, "timedelta": datetime.timedelta, "timezone": datetime.timezone},
+        )
+
+
+class SimulationFinished(BaseException):
+    """Raised from ``SimulatedClock.sleep`` once the end of the simulation is reached.
+
+    It derives from ``BaseException`` so the ``except Exception`` blocks in the fetch loop let it through.
+    """
+
+
+class SyntheticTrace:
+    """Deterministic CGM trace: a daily rhythm, meal peaks, sensor noise and the odd hypo."""
+
+    MEALS = ((7.5, 4.0), (12.5, 3.0), (18.5, 4.5))  # (hour of day, peak rise in mmol/L)
+
+    def __init__(self, seed=0, interval_sec=5 * 60, baseline=6.5, hypo_probability=0.3):
+        self.seed = seed
+        self.interval_sec = interval_sec
+        self.baseline = baseline
+        self.hypo_probability = hypo_probability
+
+    def value_at(self, ts):
+        local = datetime.datetime.fromtimestamp(ts, STOCKHOLM)
+        hour = local.hour + local.minute / 60
+        value = self.baseline + 0.8 * math.sin(2 * math.pi * (hour - 4) / 24)
+
+        for meal_hour, rise in self.MEALS:
+            since_meal = hour - meal_hour
+            if 0 <= since_meal <= 4:
+                value += rise * (since_meal / 0.75) * math.exp(1 - since_meal / 0.75)
+
+        day_rng = random.Random(f"{self.seed}:{local.date().isoformat()}")
+        if day_rng.random() < self.hypo_probability:
+            hypo_hour = day_rng.uniform(0, 24)
+            value -= 4.0 * math.exp(-(((hour - hypo_hour) / 0.5) ** 2))
+
+        value += random.Random(f"{self.seed}:{int(ts)}").gauss(0, 0.15)
+        return round(min(max(value, 2.2), 22.2), 1)
+
+    def readings(self, from_ts, to_ts):
+        first = math.ceil(from_ts / self.interval_sec) * self.interval_sec
+        for ts in range(first, int(to_ts) + 1, self.interval_sec):
+            yield ts, self.value_at(ts)
+
+
+class FakeEversenseServer:
+    """Local stand-in for the Eversense DMS endpoints used by ``EversenseClient``.
+
+    Serves ``/connect/token``, ``GetUserDetails`` and ``GetSensorGlucoseEvents`` on localhost with
+    configurable latency, error rate and token lifetime. Time is read from ``clock`` so the server can
+    share a ``SimulatedClock`` with the app under test.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        clock=time,
+        trace=None,
+        user_id=4242,
+        latency_sec=0.0,
+        latency_jitter_sec=0.0,
+        error_rate=0.0,
+        token_lifetime_sec=43200,
+        advertised_lifetime_sec=None,
+        seed=0,
+    ):
+        self.clock = clock
+        self.trace = trace or SyntheticTrace(seed=seed)
+        self.user_id = user_id
+        self.latency_sec = latency_sec
+        self.latency_jitter_sec = latency_jitter_sec
+        self.error_rate = error_rate
+        self.token_lifetime_sec = token_lifetime_sec
+        self.advertised_lifetime_sec = advertised_lifetime_sec or token_lifetime_sec
+        self.rng = random.Random(seed)
+        self.tokens = {}
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.reset_stats()
+
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.fake = self
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        self.logger.debug(f"[FakeServer] Listening on {self.url}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread:
+            self.thread.join()
+        self.logger.debug("[FakeServer] Stopped")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def configure_client(self, client):
+        """Point an ``EversenseClient`` at this server instead of the live endpoints."""
+        client.LOGIN_URL = f"{self.url}/connect/token"
+        client.USER_DETAILS_URL = f"{self.url}/api/Users/GetUserDetails?TimeZoneOffset=-120"
+        client.GLUCOSE_URL = f"{self.url}/TransmitterLog/GetSensorGlucoseEvents"
+
+    def reset_stats(self):
+        with self.lock:
+            self.requests = {}
+            self.statuses = {}
+            self.served_readings = set()
+
+    def record(self, endpoint, status):
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    @property
+    def total_requests(self):
+        with self.lock:
+            return sum(self.requests.values())
+
+    def simulate_latency(self):
+        delay = self.latency_sec + self.rng.uniform(0, self.latency_jitter_sec)
+        if delay > 0:
+            time.sleep(delay)
+
+    def should_fail(self):
+        with self.lock:
+            return self.rng.random() < self.error_rate
+
+    def issue_token(self):
+        token = secrets.token_hex(16)
+        with self.lock:
+            self.tokens[token] = self.clock.time() + self.token_lifetime_sec
+        return token
+
+    def token_valid(self, authorization):
+        if not authorization or not authorization.startswith("Bearer "):
+            return False
+        with self.lock:
+            expiry = self.tokens.get(authorization[len("Bearer ") :])
+        return expiry is not None and self.clock.time() < expiry
+
+    def glucose_events(self, from_dt, to_dt):
+        to_ts = min(to_dt.timestamp(), self.clock.time())
+        events = []
+        for ts, value in self.trace.readings(from_dt.timestamp(), to_ts):
+            events.append(
+                {
+                    "EventDate": datetime.datetime.fromtimestamp(ts, STOCKHOLM).isoformat(timespec="seconds"),
+                    "Value": round(value * 18.0),
+                    "convertedValue": value,
+                }
+            )
+        with self.lock:
+            self.served_readings.update(event["EventDate"] for event in events)
+        return events
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def fake(self):
+        return self.server.fake
+
+    def log_message(self, format, *args):
+        self.fake.logger.debug(f"[FakeServer] {format % args}")
+
+    def send_json(self, endpoint, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.fake.record(endpoint, status)
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length).decode() if length else ""
+
+    def route(self):
+        # The client's glucose URL contains a double slash, so normalise before matching
+        return "/" + urlsplit(self.path).path.lstrip("/")
+
+    def do_GET(self):
+        self.read_body()
+        path = self.route()
+        if path != "/api/Users/GetUserDetails":
+            self.send_json(path, 404, {"error": "not_found"})
+            return
+        self.handle_api(path, lambda: {"UserID": self.fake.user_id, "TimeZoneOffset": -120})
+
+    def do_POST(self):
+        body = self.read_body()
+        path = self.route()
+        if path == "/connect/token":
+            self.handle_token(path, body)
+        elif path == "/TransmitterLog/GetSensorGlucoseEvents":
+            self.handle_api(path, lambda: self.glucose_payload(body))
+        else:
+            self.send_json(path, 404, {"error": "not_found"})
+
+    def handle_token(self, path, body):
+        self.fake.simulate_latency()
+        if self.fake.should_fail():
+            self.send_json(path, 503, {"error": "service_unavailable"})
+            return
+        form = {key: values[0] for key, values in parse_qs(body).items()}
+        if form.get("grant_type") != "password" or not form.get("username") or not form.get("password"):
+            self.send_json(path, 400, {"error": "invalid_grant"})
+            return
+        self.send_json(
+            path,
+            200,
+            {
+                "access_token": self.fake.issue_token(),
+                "expires_in": self.fake.advertised_lifetime_sec,
+                "token_type": "Bearer",
+            },
+        )
+
+    def handle_api(self, path, build_payload):
+        self.fake.simulate_latency()
+        if self.fake.should_fail():
+            self.send_json(path, 503, {"error": "service_unavailable"})
+            return
+        if not self.fake.token_valid(self.headers.get("Authorization")):
+            self.send_json(path, 401, {"error": "invalid_token"})
+            return
+        try:
+            payload = build_payload()
+        except (ValueError, KeyError, TypeError) as e:
+            self.send_json(path, 400, {"error": str(e)})
+            return
+        self.send_json(path, 200, payload)
+
+    def glucose_payload(self, body):
+        query = json.loads(body)
+        if query.get("UserID") != self.fake.user_id:
+            raise ValueError(f"Unknown UserID {query.get('UserID')}")
+        from_dt = datetime.datetime.strptime(query["startDate"], "%Y-%m-%dT%H:%M:%S.%fZ")
+        to_dt = datetime.datetime.strptime(query["endDate"], "%Y-%m-%dT%H:%M:%S.%fZ")
+        return self.fake.glucose_events(
+            from_dt.replace(tzinfo=datetime.timezone.utc), to_dt.replace(tzinfo=datetime.timezone.utc)
+        )
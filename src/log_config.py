@@ -0,0 +1,194 @@
+import atexit
+import copy
+import datetime
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import threading
+import time
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+LOG_FILE_NAME = "eversense-tray.log"
+JSON_LOG_FILE_NAME = "eversense-tray.jsonl"
+
+MAX_LOG_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 7
+QUEUE_SIZE = 10000
+
+RATE_LIMIT_INTERVAL_SEC = 60
+RATE_LIMIT_BURST = 10
+
+_listener = None
+
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotates on size or at local midnight, whichever comes first, and gzips the rotated files."""
+
+    def __init__(self, filename, max_bytes=MAX_LOG_BYTES, backup_count=LOG_BACKUP_COUNT):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.namer = lambda name: f"{name}.gz"
+        self.rotator = self.compress
+        self.rollover_at = self.next_midnight()
+
+    @staticmethod
+    def next_midnight():
+        tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+        return datetime.datetime.combine(tomorrow, datetime.time()).timestamp()
+
+    @staticmethod
+    def compress(source, dest):
+        with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(source)
+
+    def shouldRollover(self, record):
+        if time.time() >= self.rollover_at and os.path.exists(self.baseFilename):
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = self.next_midnight()
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats records as one JSON object per line for the diagnostics tooling."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        for field in ("suppressed", "dropped"):
+            if getattr(record, field, 0):
+                entry[field] = getattr(record, field)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class RateLimitFilter(logging.Filter):
+    """Limits how often a single call site may log below WARNING.
+
+    Each call site gets ``burst`` records per ``interval_sec``. A call site can ask for a stricter limit of
+    one record per N seconds with ``extra={"log_interval": N}``. The number of dropped records is added to
+    the next record that gets through.
+    """
+
+    def __init__(self, interval_sec=RATE_LIMIT_INTERVAL_SEC, burst=RATE_LIMIT_BURST):
+        super().__init__()
+        self.interval_sec = interval_sec
+        self.burst = burst
+        self.sites = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+
+        log_interval = getattr(record, "log_interval", None)
+        interval, burst = (log_interval, 1) if log_interval else (self.interval_sec, self.burst)
+        key = (record.name, record.pathname, record.lineno)
+
+        with self.lock:
+            window_start, count, suppressed = self.sites.get(key, (record.created, 0, 0))
+            if record.created - window_start >= interval:
+                window_start, count = record.created, 0
+            if count >= burst:
+                self.sites[key] = (window_start, count, suppressed + 1)
+                return False
+            self.sites[key] = (window_start, count + 1, 0)
+
+        if suppressed:
+            record.suppressed = suppressed
+            record.msg = f"{record.msg} [{suppressed} similar messages suppressed]"
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the writer thread falls behind.
+
+    The number of dropped records is added to the next record that fits on the queue.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.dropped_lock = threading.Lock()
+
+    def prepare(self, record):
+        # Unlike QueueHandler.prepare, keep the traceback in exc_text instead of folding it into the message,
+        # so the listener's formatters can still place it themselves
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.getMessage()
+        record.message = record.msg
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        with self.dropped_lock:
+            if self.dropped:
+                record.dropped = self.dropped
+                record.msg = f"{record.msg} [{self.dropped} records dropped, log queue full]"
+            try:
+                self.queue.put_nowait(record)
+                self.dropped = 0
+            except queue.Full:
+                self.dropped += 1
+
+
+def setup_logging(log_dir, level=logging.INFO, json_lines=False):
+    """Route all logging through a queue to a background thread that writes the console and log file.
+
+    Callers only pay for formatting the message and putting it on the queue; disk writes, rotation and
+    compression happen on the listener thread.
+    """
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    file_handler = CompressingRotatingFileHandler(log_dir / (JSON_LOG_FILE_NAME if json_lines else LOG_FILE_NAME))
+    file_handler.setFormatter(JsonLinesFormatter() if json_lines else logging.Formatter(LOG_FORMAT))
+
+    queue_handler = NonBlockingQueueHandler(queue.Queue(QUEUE_SIZE))
+    queue_handler.addFilter(RateLimitFilter())
+
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(queue_handler)
+    root_logger.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, console_handler, file_handler)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
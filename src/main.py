@@ -1,24 +1,14 @@
 import argparse
 import logging
 
-import notify2
+import log_config
+from app import LOG_DIR, GlucoseApp
 
-from app import GlucoseApp
 
-notify2.init("Eversense CGM")
-
-
-def setup_logging(verbose=False):
+def setup_logging(verbose=False, json_lines=False):
     """Setup logging configuration based on verbosity level."""
     log_level = logging.DEBUG if verbose else logging.INFO
-
-    # Get the root logger and update its level
-    root_logger = logging.getLogger()
-    root_logger.setLevel(log_level)
-
-    # Update all existing handlers
-    for handler in root_logger.handlers:
-        handler.setLevel(log_level)
+    log_config.setup_logging(LOG_DIR, level=log_level, json_lines=json_lines)
 
 
 def main():
@@ -31,16 +21,18 @@ Examples:
   %(prog)s              Run the application with normal logging
   %(prog)s -v           Run the application with debug logging enabled
   %(prog)s --verbose    Run the application with debug logging enabled
+  %(prog)s --log-json   Write the log file as JSON lines (eversense-tray.jsonl)
   %(prog)s --help       Show this help message
         """,
     )
 
     parser.add_argument("-v", "--verbose", action="store_true", help="Enable debug logging output")
+    parser.add_argument("--log-json", action="store_true", help="Write structured JSON lines to the log file")
 
     args = parser.parse_args()
 
     # Setup logging based on command line arguments
-    setup_logging(verbose=args.verbose)
+    setup_logging(verbose=args.verbose, json_lines=args.log_json)
 
     if args.verbose:
         print("Debug logging enabled")
@@ -0,0 +1,100 @@
+import logging
+import threading
+import time
+
+import notify2
+
+
+class NotificationDispatcher:
+    """Shows desktop notifications from a worker thread so D-Bus calls never block the caller.
+
+    Every alert type (``key``) owns one persistent notification that is updated in place. Requests that
+    arrive within ``coalesce_sec`` of each other are merged, and only the latest one per key is sent.
+    notify2 is initialised lazily on the worker, so a missing daemon never delays startup.
+    """
+
+    COALESCE_SEC = 2.0
+
+    def __init__(self, app_name, coalesce_sec=COALESCE_SEC):
+        self.app_name = app_name
+        self.coalesce_sec = coalesce_sec
+        self.pending = {}
+        self.notifications = {}
+        self.condition = threading.Condition()
+        self.thread = None
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="NotificationDispatcher", daemon=True)
+        self.thread.start()
+        self.logger.debug("[Notify] Dispatcher started")
+
+    def show(self, key, title, message, urgency=notify2.URGENCY_NORMAL):
+        self.submit(key, ("show", title, message, urgency))
+
+    def close(self, key):
+        self.submit(key, ("close",))
+
+    def submit(self, key, action):
+        with self.condition:
+            if key in self.pending:
+                self.logger.debug(f"[Notify] Coalesced pending '{key}' notification")
+            self.pending[key] = action
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+
+            # Give rapid successive alerts a moment to collapse into a single update
+            time.sleep(self.coalesce_sec)
+
+            with self.condition:
+                batch, self.pending = self.pending, {}
+
+            for key, action in batch.items():
+                if action[0] == "show":
+                    self.show_now(key, *action[1:])
+                else:
+                    self.close_now(key)
+
+    def connect(self):
+        if not notify2.is_initted():
+            notify2.init(self.app_name)
+            self.logger.debug("[Notify] Connected to notification daemon")
+
+    def disconnect(self):
+        # notify2 binds a single D-Bus interface in init(), so after a failure start over with a fresh one
+        self.notifications.clear()
+        try:
+            notify2.uninit()
+        except Exception as e:
+            self.logger.debug(f"[Notify] Failed to uninitialize notify2: {e}")
+
+    def show_now(self, key, title, message, urgency):
+        try:
+            self.connect()
+            notification = self.notifications.get(key)
+            if notification is None:
+                notification = notify2.Notification(title, message)
+                self.notifications[key] = notification
+            else:
+                notification.update(title, message)
+            notification.set_urgency(urgency)
+            notification.show()
+            self.logger.debug(f"[Notify] Showed '{key}' notification: {message}")
+        except Exception as e:
+            self.disconnect()
+            self.logger.warning(f"[Notify] Failed to show '{key}' notification: {e}")
+
+    def close_now(self, key):
+        notification = self.notifications.pop(key, None)
+        if notification is None:
+            return
+        try:
+            notification.close()
+        except Exception as e:
+            self.disconnect()
+            self.logger.warning(f"[Notify] Failed to close '{key}' notification: {e}")